@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BUILD NATIVE KERNELS
+
+Ahead-of-time compiles the per-period market kernels, including the firm
+decision rules they use, into the _market_native extension module so
+simulations skip Numba's JIT compilation at startup. Requires Numba.
+
+Usage:
+    python build_native.py
+"""
+from numba.pycc import CC
+
+import market_kernels
+
+cc = CC('_market_native')
+# AOT exports have one signature each, so every float type gets its own name;
+# py_func is the undecorated kernel, which pycc compiles itself
+for name, signatures in market_kernels.SIGNATURES.items():
+    for t, signature in signatures.items():
+        cc.export(f'{name}_{t}', signature)(market_kernels.KERNELS[name].py_func)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -6,9 +6,12 @@ Created on Thu Dec 26 13:43:32 2024
 
 @author: deowulf
 """
+import functools
+import linecache
 import numpy as np
 import matplotlib.pyplot as plt
 from sympy import symbols, diff, lambdify
+from numba_compat import vectorize
 
 # Global Parameters
 FIXED_COST = 100  # Fixed cost component
@@ -38,59 +41,163 @@ DISPLAY_PARAMS = {
     }
 }
 
+# Cost kernels for TC = FC + ax + bx^2, compiled to ufuncs when Numba is available.
+# target='cpu': at the 100-1000 point grids used here, 'parallel' measured slower
+# than both 'cpu' and plain NumPy because of its thread dispatch overhead
+@vectorize(['f8(f8,f8,f8,f8)'], target='cpu')
+def _tc_ufunc(x, fc, a, b):
+    return fc + a * x + b * x * x
+
+@vectorize(['f8(f8,f8,f8,f8)'], target='cpu')
+def _ac_ufunc(x, fc, a, b):
+    return fc / x + a + b * x
+
+@vectorize(['f8(f8,f8,f8)'], target='cpu')
+def _mc_ufunc(x, a, b):
+    return a + 2 * b * x
+
+@functools.lru_cache(maxsize=None)
+def _build_mc_symbolic(fixed_cost, a, b):
+    """Differentiate TC = FC + ax + bx^2 symbolically and lambdify the result once per parameter set"""
+    x = symbols('x')
+    total_cost_expr = fixed_cost + a * x + b * x**2
+    mc_fn = lambdify(x, diff(total_cost_expr, x))
+    # lambdify registers its generated source with linecache; drop it so repeated builds don't accumulate
+    linecache.clearcache()
+    return mc_fn
+
+@functools.lru_cache(maxsize=None)
+def _cost_grid(x_min, x_max, num_points, fixed_cost, a, b):
+    """
+    Evaluate TC, AC and MC of FC + ax + bx^2 on an evenly spaced grid
+    
+    Cached per argument tuple; the arrays are read-only because they are shared.
+    """
+    x = np.linspace(x_min, x_max, num_points)
+    tc = _tc_ufunc(x, fixed_cost, a, b)
+    ac = _ac_ufunc(x, fixed_cost, a, b)
+    mc = _mc_ufunc(x, a, b)
+    for arr in (x, tc, ac, mc):
+        arr.flags.writeable = False
+    return x, tc, ac, mc
+
 class EconomicCosts:
     def __init__(self, fixed_cost=FIXED_COST):
         """
         Initialize with fixed costs and create variable cost function using global parameters
         """
         self.fixed_cost = fixed_cost
-        # Define variable cost function using parameters
-        self.variable_cost_fn = lambda x: (VARIABLE_COST_PARAMS['linear_term'] * x + 
-                                         VARIABLE_COST_PARAMS['quadratic_term'] * x**2)
+        # Cache polynomial coefficients so the cost functions avoid dict lookups
+        self._a = VARIABLE_COST_PARAMS['linear_term']
+        self._b = VARIABLE_COST_PARAMS['quadratic_term']
+        # Define variable cost function using parameters (works on scalars and arrays)
+        self.variable_cost_fn = lambda x: self._a * x + self._b * x**2
+        # Closed-form marginal cost for the built-in quadratic: MC(x) = a + 2bx
+        self._default_variable_cost_fn = self.variable_cost_fn
+        self._mc = lambda x: _mc_ufunc(x, self._a, self._b)
     
-    def total_cost(self, x):
-        """Calculate total cost TC(x) = FC + VC(x)"""
-        if x < 0:
+    def total_cost_vec(self, x):
+        """Calculate total cost TC(x) = FC + VC(x) over an array of quantities"""
+        x = np.asarray(x, dtype=float)
+        if np.any(x < 0):
             raise ValueError("Quantity must be non-negative")
+        if self.variable_cost_fn is self._default_variable_cost_fn:
+            return _tc_ufunc(x, self.fixed_cost, self._a, self._b)
         return self.fixed_cost + self.variable_cost_fn(x)
     
+    def average_cost_vec(self, x):
+        """Calculate average cost AC(x) = TC(x)/x over an array of quantities"""
+        x = np.asarray(x, dtype=float)
+        if np.any(x <= 0):
+            raise ValueError("Quantity must be positive")
+        if self.variable_cost_fn is self._default_variable_cost_fn:
+            return _ac_ufunc(x, self.fixed_cost, self._a, self._b)
+        return self.total_cost_vec(x) / x
+    
+    def marginal_cost_vec(self, x):
+        """
+        Calculate marginal cost over an array of quantities
+        Uses the closed form a + 2bx unless variable_cost_fn has been replaced
+        """
+        x = np.asarray(x, dtype=float)
+        if np.any(x < 0):
+            raise ValueError("Quantity must be non-negative")
+        if self.variable_cost_fn is self._default_variable_cost_fn:
+            return self._mc(x)
+        return self.marginal_cost_numerical(x)
+    
+    def total_cost(self, x):
+        """Calculate total cost TC(x) = FC + VC(x)"""
+        if isinstance(x, (int, float)):
+            # Plain arithmetic for a single quantity; NumPy call overhead would dominate
+            if x < 0:
+                raise ValueError("Quantity must be non-negative")
+            return self.fixed_cost + self.variable_cost_fn(x)
+        return float(self.total_cost_vec(x))
+    
     def average_cost(self, x):
         """Calculate average cost AC(x) = TC(x)/x"""
-        if x <= 0:
-            raise ValueError("Quantity must be positive")
-        return self.total_cost(x) / x
+        if isinstance(x, (int, float)):
+            if x <= 0:
+                raise ValueError("Quantity must be positive")
+            return self.total_cost(x) / x
+        return float(self.average_cost_vec(x))
+    
+    def marginal_cost(self, x):
+        """Calculate marginal cost MC(x) = dTC/dx"""
+        if isinstance(x, (int, float)) and self.variable_cost_fn is self._default_variable_cost_fn:
+            if x < 0:
+                raise ValueError("Quantity must be non-negative")
+            return float(self._a + 2 * self._b * x)
+        return float(self.marginal_cost_vec(x))
     
     def marginal_cost_numerical(self, x, h=NUMERICAL_PARAMS['h']):
-        """Calculate marginal cost using numerical differentiation"""
-        if x < 0:
+        """
+        Calculate marginal cost using central differences
+        MC(x) ≈ [TC(x+h) - TC(x-h)]/(2h), used for user-supplied cost functions;
+        quantities below h use the forward difference [TC(x+h) - TC(x)]/h so
+        the cost function is never evaluated at a negative quantity
+        """
+        x = np.asarray(x, dtype=float)
+        if np.any(x < 0):
             raise ValueError("Quantity must be non-negative")
-        return (self.total_cost(x + h) - self.total_cost(x)) / h
+        near_zero = x < h
+        lower = np.where(near_zero, x, x - h)
+        return (self.variable_cost_fn(x + h) - self.variable_cost_fn(lower)) / np.where(near_zero, h, 2 * h)
+    
+    def cost_grid(self, num_points=PLOTTING_PARAMS['num_points']):
+        """Return (x, TC, AC, MC) arrays over the plotting range"""
+        x_min, x_max = PLOTTING_PARAMS['x_min'], PLOTTING_PARAMS['x_max']
+        if self.variable_cost_fn is self._default_variable_cost_fn:
+            return _cost_grid(x_min, x_max, num_points, self.fixed_cost, self._a, self._b)
+        x = np.linspace(x_min, x_max, num_points)
+        return x, self.total_cost_vec(x), self.average_cost_vec(x), self.marginal_cost_vec(x)
     
     def create_marginal_cost_symbolic(self):
-        """Create symbolic marginal cost function"""
-        x = symbols('x')
-        # Define symbolic total cost function using parameters
-        total_cost_expr = (self.fixed_cost + 
-                          VARIABLE_COST_PARAMS['linear_term'] * x + 
-                          VARIABLE_COST_PARAMS['quadratic_term'] * x**2)
-        return lambdify(x, diff(total_cost_expr, x))
+        """Create symbolic marginal cost function (cached per parameter set)"""
+        return _build_mc_symbolic(self.fixed_cost, self._a, self._b)
     
     def average_cost_derivative_numerical(self, x, h=NUMERICAL_PARAMS['h']):
         """
         Calculate the first derivative of average cost using numerical differentiation
         d(AC)/dx = d(TC/x)/dx = (MC - AC)/x
         """
-        if x < 0:
-            raise ValueError("Quantity must be non-negative")
+        if x <= 0:
+            raise ValueError("Quantity must be positive")
+        
+        # Evaluate TC once at x and x+h and reuse both values below
+        tc_x = self.total_cost(x)
+        tc_xh = self.total_cost(x + h)
+        mc = (tc_xh - tc_x) / h
+        ac_x = tc_x / x
+        ac_xh = tc_xh / (x + h)
             
         # We can calculate this two ways:
         # 1. Using numerical differentiation directly on AC
-        ac_derivative_numerical = (self.average_cost(x + h) - self.average_cost(x)) / h
+        ac_derivative_numerical = (ac_xh - ac_x) / h
         
         # 2. Using the formula (MC - AC)/x
-        mc = self.marginal_cost_numerical(x)
-        ac = self.average_cost(x)
-        ac_derivative_formula = (mc - ac) / x
+        ac_derivative_formula = (mc - ac_x) / x
         
         return {
             'numerical': ac_derivative_numerical,
@@ -100,31 +207,37 @@ class EconomicCosts:
     def analyze_ac_derivative(self, x):
         """Analyze the derivative of AC at a given point"""
         derivatives = self.average_cost_derivative_numerical(x)
-        
-        print(f"\nAt quantity {x}:")
-        print(f"AC derivative (numerical): {derivatives['numerical']:.4f}")
-        print(f"AC derivative (formula): {derivatives['formula']:.4f}")
-        
-        if abs(derivatives['numerical']) < NUMERICAL_PARAMS['epsilon']:
-            print("AC is at a critical point (minimum or maximum)")
-        elif derivatives['numerical'] > 0:
-            print("AC is increasing")
-        else:
-            print("AC is decreasing")
-            
+        print_ac_derivative(x, derivatives['numerical'], derivatives['formula'])
         return derivatives
 
+    def analyze_points(self, xs, h=NUMERICAL_PARAMS['h']):
+        """
+        Compute TC, AC, MC and AC-derivative diagnostics for all quantities at once
+        
+        Returns:
+            dict: NumPy arrays keyed by 'x', 'tc', 'ac', 'mc', 'dac_dx' (formula)
+                  and 'dac_dx_numerical' (forward difference on AC)
+        """
+        x = np.asarray(xs, dtype=float)
+        tc = self.total_cost_vec(x)
+        ac = self.average_cost_vec(x)
+        mc = self.marginal_cost_vec(x)
+        ac_xh = self.total_cost_vec(x + h) / (x + h)
+        return {
+            'x': x,
+            'tc': tc,
+            'ac': ac,
+            'mc': mc,
+            'dac_dx': (mc - ac) / x,
+            'dac_dx_numerical': (ac_xh - ac) / h
+        }
+
     def plot_all_costs(self):
         """Plot TC, AC, and MC curves using plotting parameters"""
-        x = np.linspace(PLOTTING_PARAMS['x_min'], 
-                       PLOTTING_PARAMS['x_max'], 
-                       PLOTTING_PARAMS['num_points'])
-        
-        # Calculate costs
-        tc = [self.total_cost(xi) for xi in x]
-        ac = [self.average_cost(xi) for xi in x]
-        mc = [self.marginal_cost_numerical(xi) for xi in x]
-        
+        self._plot_cost_curves(*self.cost_grid())
+    
+    def _plot_cost_curves(self, x, tc, ac, mc):
+        """Draw precomputed TC, AC and MC arrays (see cost_grid)"""
         # Create plot
         plt.figure(figsize=PLOTTING_PARAMS['figure_size'])
         
@@ -151,19 +264,33 @@ class EconomicCosts:
         plt.show()
     
     def find_minimum_ac(self):
-        """Find quantity that minimizes average cost"""
-        x = np.linspace(PLOTTING_PARAMS['x_min'], 
-                       PLOTTING_PARAMS['x_max'], 
-                       PLOTTING_PARAMS['num_points'] * 10)  # Using more points for accuracy
-        ac = [self.average_cost(xi) for xi in x]
+        """
+        Find quantity that minimizes average cost
+        For the default quadratic, AC = FC/x + a + bx is minimized at x* = sqrt(FC/b)
+        with AC* = a + 2*sqrt(FC*b); otherwise AC is scanned on a fine grid
+        """
+        if (self.variable_cost_fn is self._default_variable_cost_fn
+                and self._b > 0 and self.fixed_cost > 0):
+            return np.sqrt(self.fixed_cost / self._b), self._a + 2 * np.sqrt(self.fixed_cost * self._b)
+        x, _, ac, _ = self.cost_grid(PLOTTING_PARAMS['num_points'] * 10)  # Using more points for accuracy
         min_idx = np.argmin(ac)
         return x[min_idx], ac[min_idx]
 
-def analyze_ac_mc_relationship(x, econ):
-    """Analyze the relationship between AC and MC at a given quantity"""
-    ac = econ.average_cost(x)
-    mc = econ.marginal_cost_numerical(x)
+def print_ac_derivative(x, numerical, formula):
+    """Print the AC derivative at a quantity and whether AC is rising or falling"""
+    print(f"\nAt quantity {x}:")
+    print(f"AC derivative (numerical): {numerical:.4f}")
+    print(f"AC derivative (formula): {formula:.4f}")
     
+    if abs(numerical) < NUMERICAL_PARAMS['epsilon']:
+        print("AC is at a critical point (minimum or maximum)")
+    elif numerical > 0:
+        print("AC is increasing")
+    else:
+        print("AC is decreasing")
+
+def print_ac_mc_relationship(x, ac, mc):
+    """Print how MC compares with AC at a quantity"""
     # Compare MC and AC using global epsilon
     if abs(mc - ac) < NUMERICAL_PARAMS['epsilon']:
         print(f"\nAt quantity {x}:")
@@ -174,7 +301,12 @@ def analyze_ac_mc_relationship(x, econ):
     else:
         print(f"\nAt quantity {x}:")
         print("MC < AC: Average cost is decreasing")
-    
+
+def analyze_ac_mc_relationship(x, econ):
+    """Analyze the relationship between AC and MC at a given quantity"""
+    ac = econ.average_cost(x)
+    mc = econ.marginal_cost(x)
+    print_ac_mc_relationship(x, ac, mc)
     return {'AC': ac, 'MC': mc}
 
 def main():
@@ -188,10 +320,9 @@ def main():
     print("\nCost calculations for different quantities:")
     
     # Calculate costs for test quantities
-    for q in DISPLAY_PARAMS['test_quantities']:
-        tc = econ.total_cost(q)
-        ac = econ.average_cost(q)
-        mc = econ.marginal_cost_numerical(q)
+    quantities = DISPLAY_PARAMS['test_quantities']
+    costs = econ.analyze_points(quantities)
+    for q, tc, ac, mc in zip(quantities, costs['tc'], costs['ac'], costs['mc']):
         print(f"\nAt quantity {q}:")
         print(f"Total Cost: {tc:.2f}")
         print(f"Average Cost: {ac:.2f}")
@@ -204,21 +335,22 @@ def main():
     print(f"Average Cost: {min_ac:.2f}")
     
     # Analyze derivatives of AC at test points
+    test_points = ANALYSIS_PARAMS['test_points']
+    analysis = econ.analyze_points(test_points)
     print("\nAnalyzing AC Derivatives:")
-    for x in ANALYSIS_PARAMS['test_points']:
-        derivatives = econ.analyze_ac_derivative(x)
+    for x, numerical, formula in zip(test_points, analysis['dac_dx_numerical'], analysis['dac_dx']):
+        print_ac_derivative(x, numerical, formula)
     
     # Analyze MC-AC relationship at different points
     print("\nAnalyzing MC-AC Relationship:")
     relationships = []
-    for x in ANALYSIS_PARAMS['test_points']:
-        result = analyze_ac_mc_relationship(x, econ)
-        relationships.append(result)
+    for x, ac, mc in zip(test_points, analysis['ac'], analysis['mc']):
+        print_ac_mc_relationship(x, ac, mc)
+        relationships.append({'AC': ac, 'MC': mc})
     
-    # Find where MC = AC (minimum average cost point)
-    min_q, min_ac = econ.find_minimum_ac()
+    # Find where MC = AC (minimum average cost point found above)
     print(f"\nAt minimum average cost point (x ≈ {min_q:.2f}):")
-    mc_at_min = econ.marginal_cost_numerical(min_q)
+    mc_at_min = econ.marginal_cost(min_q)
     print(f"AC = {min_ac:.2f}")
     print(f"MC = {mc_at_min:.2f}")
     
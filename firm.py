@@ -1,7 +1,26 @@
+import operator
+import numpy as np
 import matplotlib.pyplot as plt
+import firm_kernels
 
 # firm.py
+DEFAULT_MAX_PERIODS = 100  # Initial history buffer length; buffers grow if exceeded
+
+def _grow(buffer, length):
+    """Return a copy of buffer with room for at least length entries"""
+    grown = np.empty(max(length, 2 * len(buffer)), dtype=buffer.dtype)
+    grown[:len(buffer)] = buffer
+    return grown
+
 class Firm:
+    # Per-strategy constants: (target margin multiplier, production ratio,
+    # capacity investment ratio, efficiency investment ratio)
+    STRATEGY_PARAMS = {
+        'aggressive': (1.5, 0.9, 0.3, 0.2),
+        'balanced': (1.2, 0.7, 0.2, 0.15),
+        'conservative': (1.0, 0.5, 0.1, 0.1)
+    }
+
     @staticmethod
     def validate_firm_params(params):
         required = ['initial_capital', 'strategy', 'production', 'costs', 'inventory', 
@@ -10,9 +29,9 @@ class Firm:
     
     @staticmethod
     def validate_strategy(strategy):
-        return strategy in ['aggressive', 'conservative', 'balanced']
+        return strategy in Firm.STRATEGY_PARAMS
 
-    def __init__(self, name, firm_params):
+    def __init__(self, name, firm_params, max_periods=DEFAULT_MAX_PERIODS):
         if not self.validate_firm_params(firm_params):
             raise ValueError("Invalid firm parameters")
         
@@ -22,6 +41,8 @@ class Firm:
         self.name = name
         self.capital = firm_params['initial_capital']
         self.strategy = firm_params['strategy']
+        (self._target_margin_mult, self._production_ratio,
+         self._cap_inv_ratio, self._eff_inv_ratio) = self.STRATEGY_PARAMS[self.strategy]
         
         from production import Production
         from costs import Costs
@@ -34,80 +55,95 @@ class Firm:
         self.risk_tolerance = firm_params['risk_tolerance']
         self.min_profit_margin = firm_params['min_profit_margin']
         self.max_inventory_ratio = firm_params['max_inventory_ratio']
+        self._recompute_unit_cost()
         
         # Add tracking metrics
         self.total_revenue = 0
         self.total_costs = 0
-        self.production_history = []
-        self.revenue_history = []
-        self.cost_history = []
-        self.profit_history = []
-        self.periods = []
+        # Histories are preallocated float64 buffers filled up to a cursor;
+        # the *_history properties expose the filled part as array views
+        self._production_buf = np.empty(max_periods, dtype=np.float64)
+        self._revenue_buf = np.empty(max_periods, dtype=np.float64)
+        self._cost_buf = np.empty(max_periods, dtype=np.float64)
+        self._profit_buf = np.empty(max_periods, dtype=np.float64)
+        self._n_decisions = 0  # Production decisions recorded
+        self._t = 0  # Periods recorded by update_capital
+
+    @property
+    def production_history(self):
+        return self._production_buf[:self._n_decisions]
+
+    @property
+    def revenue_history(self):
+        return self._revenue_buf[:self._t]
+
+    @property
+    def cost_history(self):
+        return self._cost_buf[:self._t]
+
+    @property
+    def profit_history(self):
+        return self._profit_buf[:self._t]
+
+    @property
+    def periods(self):
+        return np.arange(self._t)
+
+    def _recompute_unit_cost(self):
+        """
+        Cache unit cost and strategy target price
+        
+        Must be called whenever capacity, efficiency or cost parameters change,
+        unless the cache is cleared by setting _unit_cost to None; it is then
+        recomputed on the next production decision.
+        """
+        self._unit_cost = firm_kernels.unit_cost(
+            float(self.costs.variable_cost_per_unit),
+            float(self.production.efficiency),
+            float(self.costs.overhead_ratio),
+            float(self.costs.fixed_costs),
+            float(self.production.capacity)
+        )
+        self._target_price = firm_kernels.target_price(
+            self._unit_cost, self._target_margin_mult, float(self.min_profit_margin)
+        )
 
-    def make_production_decision(self, market_data):
+    def make_production_decision(self, market_price):
         """
         Decide how much to produce based on market conditions and firm strategy
         
         Args:
-            market_data (dict): Dictionary containing market information including price
+            market_price (float): Current market price
             
         Returns:
             float: Quantity to produce this period
         """
-        # Extract market price from market data
-        market_price = float(market_data['price']) if isinstance(market_data, dict) else float(market_data)
-
-        # Calculate available production capacity
-        max_production = self.production.capacity
-        
-        # Calculate current inventory space
-        available_space = self.inventory.max_capacity - self.inventory.current_stock
-        
-        # Calculate unit cost including variable and overhead costs with efficiency
-        unit_cost = (
-            (self.costs.variable_cost_per_unit / self.production.efficiency) + 
-            self.costs.overhead_ratio * self.costs.fixed_costs / max_production
+        if self._unit_cost is None:
+            self._recompute_unit_cost()
+        production = firm_kernels.production_quantity(
+            float(self.capital),
+            float(self.production.capacity),
+            self._unit_cost,
+            self._target_price,
+            float(self.inventory.max_capacity - self.inventory.current_stock),
+            float(market_price),
+            float(self.risk_tolerance),
+            self._production_ratio
         )
         
-        # Calculate target profit margin based on strategy
-        target_margin = {
-            'aggressive': 1.5 * self.min_profit_margin,
-            'balanced': 1.2 * self.min_profit_margin,
-            'conservative': 1.0 * self.min_profit_margin
-        }[self.strategy]
-        
-        # Calculate break-even price with target margin
-        target_price = unit_cost * (1 + target_margin)
-        
-        # Determine production quantity based on strategy and market conditions
-        if market_price >= target_price:
-            # Price is good - produce based on strategy
-            production_ratios = {
-                'aggressive': 0.9,
-                'balanced': 0.7,
-                'conservative': 0.5
-            }
-            base_production = max_production * production_ratios[self.strategy]
-            
-            # Adjust for risk tolerance
-            production = base_production * (1 + (self.risk_tolerance - 0.5))
-        else:
-            # Price is below target - reduce production
-            price_ratio = market_price / target_price
-            production = max_production * price_ratio * self.risk_tolerance
-        
-        # Ensure production doesn't exceed available inventory space
-        production = min(production, available_space)
-        
-        # Ensure production is within capital constraints
-        max_affordable = self.capital / unit_cost
-        production = min(production, max_affordable)
-        
         # Track production decision
-        self.production_history.append(production)
+        self.record_production(production)
         
         return max(0, production)  # Ensure non-negative production
 
+    def record_production(self, production):
+        """Append a production decision to the production history"""
+        n = self._n_decisions
+        if n == len(self._production_buf):
+            self._production_buf = _grow(self._production_buf, n + 1)
+        self._production_buf[n] = production
+        self._n_decisions = n + 1
+
     def make_investment_decisions(self, market_price):
         """
         Make strategic investments in capacity and efficiency
@@ -115,50 +151,50 @@ class Firm:
         Args:
             market_price (float): Current market price
         """
-        # Only invest if we have sufficient capital buffer
-        investment_budget = max(0, self.capital - self.costs.fixed_costs * 2)
-        
-        if investment_budget <= 0:
-            return
-        
-        # Investment ratios based on strategy
-        capacity_investment_ratio = {
-            'aggressive': 0.3,
-            'balanced': 0.2,
-            'conservative': 0.1
-        }[self.strategy]
-        
-        efficiency_investment_ratio = {
-            'aggressive': 0.2,
-            'balanced': 0.15,
-            'conservative': 0.1
-        }[self.strategy]
-        
-        # Calculate potential investments
-        capacity_investment = investment_budget * capacity_investment_ratio
-        efficiency_investment = investment_budget * efficiency_investment_ratio
+        # Investment sizes from the strategy investment ratios
+        capacity_increase, efficiency_increase = firm_kernels.investment_amounts(
+            float(self.capital),
+            float(self.costs.fixed_costs),
+            float(self.production.upgrade_cost_factor),
+            self._cap_inv_ratio,
+            self._eff_inv_ratio
+        )
         
         # Upgrade capacity
-        if capacity_investment > self.production.upgrade_cost_factor:
-            capacity_increase = capacity_investment / self.production.upgrade_cost_factor
+        if capacity_increase > 0:
             cost = self.production.upgrade_capacity(capacity_increase)
             self.capital -= cost
             self.total_costs += cost
 
         # Improve efficiency
-        if efficiency_investment > self.production.upgrade_cost_factor * 2:
-            efficiency_increase = efficiency_investment / (self.production.upgrade_cost_factor * 2)
+        if efficiency_increase > 0:
             cost = self.production.improve_efficiency(efficiency_increase)
             self.capital -= cost
             self.total_costs += cost
 
+        # Capacity or efficiency may have changed
+        self._recompute_unit_cost()
+
     def plot_financial_metrics(self):
         """Plot firm's financial metrics"""
+        self._plot_financial_metrics(*self._compute_financial_series())
+    
+    def _compute_financial_series(self):
+        """
+        Build the plotted series as NumPy arrays
+        
+        Returns:
+            tuple: (periods, revenue, costs, profits) arrays
+        """
+        return self.periods, self.revenue_history, self.cost_history, self.profit_history
+    
+    def _plot_financial_metrics(self, periods, revenue, costs, profits):
+        """Draw precomputed revenue, cost and profit series"""
         plt.figure(figsize=(15, 10))
         
         # Revenue plot
         plt.subplot(3, 1, 1)
-        plt.plot(self.periods, self.revenue_history, 'g-', label='Revenue')
+        plt.plot(periods, revenue, 'g-', label='Revenue')
         plt.title(f'{self.name} - Revenue Over Time')
         plt.xlabel('Period')
         plt.ylabel('Revenue')
@@ -167,7 +203,7 @@ class Firm:
         
         # Cost plot
         plt.subplot(3, 1, 2)
-        plt.plot(self.periods, self.cost_history, 'r-', label='Costs')
+        plt.plot(periods, costs, 'r-', label='Costs')
         plt.title(f'{self.name} - Costs Over Time')
         plt.xlabel('Period')
         plt.ylabel('Costs')
@@ -176,8 +212,7 @@ class Firm:
         
         # Profit plot
         plt.subplot(3, 1, 3)
-        profits = [r - c for r, c in zip(self.revenue_history, self.cost_history)]
-        plt.plot(self.periods, profits, 'b-', label='Profit')
+        plt.plot(periods, profits, 'b-', label='Profit')
         plt.title(f'{self.name} - Profit Over Time')
         plt.xlabel('Period')
         plt.ylabel('Profit')
@@ -200,9 +235,15 @@ class Firm:
         self.total_costs += costs
         
         # History for graphs
-        self.revenue_history.append(revenue)
-        self.cost_history(costs)
-        self.periods.append(len(self.periods))
+        t = self._t
+        if t == len(self._revenue_buf):
+            self._revenue_buf = _grow(self._revenue_buf, t + 1)
+            self._cost_buf = _grow(self._cost_buf, t + 1)
+            self._profit_buf = _grow(self._profit_buf, t + 1)
+        self._revenue_buf[t] = revenue
+        self._cost_buf[t] = costs
+        self._profit_buf[t] = revenue - costs
+        self._t = t + 1
 
     def get_performance_metrics(self):
         """
@@ -211,6 +252,7 @@ class Firm:
         Returns:
             dict: Dictionary containing various performance metrics
         """
+        n, t = self._n_decisions, self._t
         return {
             'name': self.name,
             'capital': self.capital,
@@ -220,6 +262,103 @@ class Firm:
             'total_revenue': self.total_revenue,
             'total_costs': self.total_costs,
             'profit_margin': (self.total_revenue - self.total_costs) / self.total_revenue if self.total_revenue > 0 else 0,
-            'capacity_utilization': sum(self.production_history[-3:]) / (self.production.capacity * 3) if self.production_history else 0,
-            'revenue_growth': ((self.revenue_history[-1] / self.revenue_history[-2]) - 1) if len(self.revenue_history) > 1 else 0
-        }
\ No newline at end of file
+            'capacity_utilization': self._production_buf[max(0, n - 3):n].sum() / (self.production.capacity * 3) if n else 0,
+            'revenue_growth': ((self._revenue_buf[t - 1] / self._revenue_buf[t - 2]) - 1) if t > 1 else 0
+        }
+
+
+class FirmPool:
+    """
+    State of many firms held as parallel arrays of one float dtype (one slot per firm)
+    
+    Gathers the state of a sequence of Firm objects, keeping their order;
+    results are copied back onto the firms with write_back.
+    """
+    STRATEGIES = tuple(Firm.STRATEGY_PARAMS)
+    # Strategy-indexed lookup tables, ordered like STRATEGIES
+    MARGIN_TABLE = np.array([Firm.STRATEGY_PARAMS[s][0] for s in STRATEGIES])
+    PRODUCTION_RATIO_TABLE = np.array([Firm.STRATEGY_PARAMS[s][1] for s in STRATEGIES])
+    CAPACITY_INVESTMENT_TABLE = np.array([Firm.STRATEGY_PARAMS[s][2] for s in STRATEGIES])
+    EFFICIENCY_INVESTMENT_TABLE = np.array([Firm.STRATEGY_PARAMS[s][3] for s in STRATEGIES])
+    # The four tables stacked as rows, so a pool resolves them in one take
+    STRATEGY_TABLE = np.array([MARGIN_TABLE, PRODUCTION_RATIO_TABLE,
+                               CAPACITY_INVESTMENT_TABLE, EFFICIENCY_INVESTMENT_TABLE])
+    # Per-firm pool arrays and the Firm attributes they are gathered from
+    FIELDS = {
+        'capital': 'capital',
+        'capacity': 'production.capacity',
+        'efficiency': 'production.efficiency',
+        'max_efficiency': 'production.max_efficiency',
+        'upgrade_cost_factor': 'production.upgrade_cost_factor',
+        'maintenance_cost_factor': 'production.maintenance_cost_factor',
+        'variable_cost_per_unit': 'costs.variable_cost_per_unit',
+        'overhead_ratio': 'costs.overhead_ratio',
+        'fixed_costs': 'costs.fixed_costs',
+        'risk_tolerance': 'risk_tolerance',
+        'min_profit_margin': 'min_profit_margin',
+        'total_costs': 'total_costs'
+    }
+    _gather = operator.attrgetter(*FIELDS.values())
+
+    def __init__(self, firms, dtype=np.float64):
+        from inventory import InventoryArray
+        
+        firms = list(firms)
+        self.names = [firm.name for firm in firms]
+        self.strategy_id = np.array([self.STRATEGIES.index(firm.strategy) for firm in firms], dtype=np.int8)
+        # Strategy constants resolved per firm once, in the pool dtype
+        (self.target_margin_mult, self.production_ratio, self.capacity_investment_ratio,
+         self.efficiency_investment_ratio) = self.STRATEGY_TABLE.astype(dtype, copy=False).take(self.strategy_id, axis=1)
+        # One pass over the firms gathers every field; each array is a contiguous row
+        state = np.array([self._gather(firm) for firm in firms], dtype=dtype).reshape(len(firms), len(self.FIELDS))
+        for name, values in zip(self.FIELDS, state.T.copy()):
+            setattr(self, name, values)
+        self.inventory = InventoryArray.from_inventories((firm.inventory for firm in firms), dtype=dtype)
+
+    def decide_production(self, market_price, kernel=firm_kernels.decide_production):
+        """
+        Firm.make_production_decision for every firm in the pool
+        
+        Args:
+            market_price (float): Current market price
+            kernel: Implementation of firm_kernels.decide_production to run,
+                    e.g. one compiled ahead of time for the pool dtype
+            
+        Returns:
+            np.ndarray: Non-negative quantity to produce for each firm
+        """
+        # A NumPy float64 price would otherwise promote float32 pools to float64
+        market_price = self.capital.dtype.type(market_price)
+        return kernel(
+            market_price, self.capital, self.inventory.current_stock, self.inventory.max_capacity,
+            self.capacity, self.efficiency, self.variable_cost_per_unit, self.overhead_ratio,
+            self.fixed_costs, self.target_margin_mult, self.min_profit_margin,
+            self.production_ratio, self.risk_tolerance
+        )
+
+    def make_investment_decisions(self, kernel=firm_kernels.make_investments):
+        """
+        Firm.make_investment_decisions for every firm in the pool, in place
+        
+        Args:
+            kernel: Implementation of firm_kernels.make_investments to run
+        """
+        kernel(
+            self.capital, self.capacity, self.efficiency, self.max_efficiency,
+            self.upgrade_cost_factor, self.fixed_costs, self.capacity_investment_ratio,
+            self.efficiency_investment_ratio, self.total_costs
+        )
+
+    def write_back(self, firms):
+        """Copy capital, capacity, efficiency, costs and stock back onto the matching Firm objects"""
+        firms = list(firms)
+        for firm, capital, total_costs, capacity, efficiency in zip(
+                firms, self.capital.tolist(), self.total_costs.tolist(),
+                self.capacity.tolist(), self.efficiency.tolist()):
+            firm.capital = capital
+            firm.total_costs = total_costs
+            firm.production.capacity = capacity
+            firm.production.efficiency = efficiency
+            # Capacity or efficiency may have changed; recomputed when the firm next decides
+            firm._unit_cost = None
+        self.inventory.write_back(firm.inventory for firm in firms)
@@ -0,0 +1,139 @@
+# firm_kernels.py
+"""
+Firm decision rules shared by Firm, FirmPool and the market kernels.
+
+Each rule is written once as a function of one firm's numbers; the row
+functions apply it to every firm of a set of parallel arrays (one slot per
+firm, as in FirmPool). Everything is compiled by Numba when it is available.
+Without Numba the rules run as plain Python and the row functions as
+whole-array NumPy expressions of the same rules (see numba_compat).
+"""
+import numpy as np
+from numba_compat import njit, numpy_fallback
+
+@njit(cache=True)
+def unit_cost(var_cost, efficiency, overhead, fixed, capacity):
+    """Unit cost including variable and overhead costs with efficiency"""
+    return (var_cost / efficiency) + overhead * fixed / capacity
+
+@njit(cache=True)
+def target_price(unit_cost, margin_mult, min_margin):
+    """Break-even price with strategy target margin"""
+    return unit_cost * (1 + margin_mult * min_margin)
+
+@njit(cache=True)
+def production_quantity(capital, capacity, unit_cost, target_price,
+                        inv_space, price, risk, prod_ratio):
+    """
+    Quantity a firm decides to produce at the given market price
+
+    The result is not clipped at zero; the caller does that.
+    """
+    if price >= target_price:
+        # Price is good - produce based on strategy, adjusted for risk tolerance
+        production = capacity * prod_ratio * (1 + (risk - 0.5))
+    else:
+        # Price is below target - reduce production
+        production = capacity * (price / target_price) * risk
+
+    # Stay within inventory space and capital constraints
+    production = min(production, inv_space)
+    return min(production, capital / unit_cost)
+
+@njit(cache=True)
+def production_cost(quantity, var_cost, efficiency, fixed, capacity, maint_factor):
+    """Cost of producing quantity: variable cost at the current efficiency plus fixed and maintenance costs"""
+    return (var_cost / efficiency) * quantity + fixed + capacity * maint_factor
+
+@njit(cache=True)
+def investment_amounts(capital, fixed, upgrade_cost, capacity_ratio, efficiency_ratio):
+    """
+    Capacity and efficiency increases bought under the strategy investment ratios
+
+    Only capital above twice the fixed costs is invested, and an upgrade is
+    only bought when its budget covers at least one unit.
+    """
+    investment_budget = max(0.0, capital - fixed * 2)
+    capacity_investment = investment_budget * capacity_ratio
+    efficiency_investment = investment_budget * efficiency_ratio
+
+    capacity_increase = 0.0
+    if capacity_investment > upgrade_cost:
+        capacity_increase = capacity_investment / upgrade_cost
+    efficiency_increase = 0.0
+    if efficiency_investment > upgrade_cost * 2:
+        efficiency_increase = efficiency_investment / (upgrade_cost * 2)
+    return capacity_increase, efficiency_increase
+
+def _decide_production_numpy(price, capital, stock, max_stock, capacity, efficiency, var_cost,
+                             overhead, fixed, margin_mult, min_margin, prod_ratio, risk):
+    """decide_production over whole arrays"""
+    cost = unit_cost(var_cost, efficiency, overhead, fixed, capacity)
+    target = target_price(cost, margin_mult, min_margin)
+    # Both branches of production_quantity, selected per firm
+    production = np.where(
+        price >= target,
+        capacity * prod_ratio * (1 + (risk - 0.5)),
+        capacity * (price / target) * risk
+    )
+    production = np.minimum(np.minimum(production, max_stock - stock), capital / cost)
+    return np.maximum(production, 0.0)
+
+@numpy_fallback(_decide_production_numpy)
+@njit(cache=True)
+def decide_production(price, capital, stock, max_stock, capacity, efficiency, var_cost,
+                      overhead, fixed, margin_mult, min_margin, prod_ratio, risk):
+    """production_quantity for every firm, clipped at zero"""
+    quantity = np.empty_like(capital)
+    for i in range(capital.shape[0]):
+        cost = unit_cost(var_cost[i], efficiency[i], overhead[i], fixed[i], capacity[i])
+        production = production_quantity(
+            capital[i], capacity[i], cost, target_price(cost, margin_mult[i], min_margin[i]),
+            max_stock[i] - stock[i], price, risk[i], prod_ratio[i]
+        )
+        quantity[i] = max(production, 0.0)
+    return quantity
+
+def _make_investments_numpy(capital, capacity, efficiency, max_efficiency, upgrade_cost, fixed,
+                            capacity_ratio, efficiency_ratio, total_costs):
+    """make_investments over whole arrays"""
+    # Same budget and thresholds as investment_amounts, selected per firm
+    investment_budget = np.maximum(capital - fixed * 2, 0.0)
+    capacity_investment = investment_budget * capacity_ratio
+    efficiency_investment = investment_budget * efficiency_ratio
+    capacity_increase = np.where(
+        capacity_investment > upgrade_cost, capacity_investment / upgrade_cost, 0.0
+    )
+    efficiency_increase = np.where(
+        efficiency_investment > upgrade_cost * 2, efficiency_investment / (upgrade_cost * 2), 0.0
+    )
+
+    cost = upgrade_cost * capacity_increase
+    capacity += capacity_increase
+    capital -= cost
+    total_costs += cost
+
+    cost = upgrade_cost * efficiency_increase * 2
+    np.minimum(max_efficiency, efficiency + efficiency_increase, out=efficiency)
+    capital -= cost
+    total_costs += cost
+
+@numpy_fallback(_make_investments_numpy)
+@njit(cache=True)
+def make_investments(capital, capacity, efficiency, max_efficiency, upgrade_cost, fixed,
+                     capacity_ratio, efficiency_ratio, total_costs):
+    """Buy the investment_amounts of every firm in place, paying for them from capital"""
+    for i in range(capital.shape[0]):
+        capacity_increase, efficiency_increase = investment_amounts(
+            capital[i], fixed[i], upgrade_cost[i], capacity_ratio[i], efficiency_ratio[i]
+        )
+        # Upgrade prices as in Production.upgrade_capacity and improve_efficiency
+        cost = upgrade_cost[i] * capacity_increase
+        capacity[i] += capacity_increase
+        capital[i] -= cost
+        total_costs[i] += cost
+
+        cost = upgrade_cost[i] * efficiency_increase * 2
+        efficiency[i] = min(max_efficiency[i], efficiency[i] + efficiency_increase)
+        capital[i] -= cost
+        total_costs[i] += cost
@@ -10,6 +10,8 @@ def plot_utility_comparisons():
     
     # MODIFY: Change utility levels to plot different indifference curves
     utility_levels = [2, 4, 6, 8]  # Add or remove values to show more/fewer curves
+    # Utility levels as a column so each formula broadcasts to one (K, N) array of curves
+    u = np.array(utility_levels, dtype=float).reshape(-1, 1)
     
     # 1. Cobb-Douglas
     ax = axes[0]
@@ -18,9 +20,9 @@ def plot_utility_comparisons():
     # alpha > beta means stronger preference for good 1
     # alpha < beta means stronger preference for good 2
     alpha, beta = 0.5, 0.5
-    for u in utility_levels:
-        x2 = np.exp((np.log(u) - alpha * np.log(x1)) / beta)
-        ax.plot(x1, x2, '--', label=f'U={u}')
+    x2 = np.exp((np.log(u) - alpha * np.log(x1)) / beta)
+    for level, curve in zip(utility_levels, x2):
+        ax.plot(x1, curve, '--', label=f'U={level}')
     ax.set_title('Cobb-Douglas\nU = x₁ᵅ × x₂ᵝ')
     
     # MODIFY: Change axis limits for Cobb-Douglas plot
@@ -35,9 +37,11 @@ def plot_utility_comparisons():
     # rho → -∞: goods become perfect complements (L-shaped)
     # rho = 0: Cobb-Douglas case
     rho = 0.5
-    for u in utility_levels:
-        x2 = (u**rho - x1**rho)**(1/rho)
-        ax.plot(x1, x2, '--', label=f'U={u}')
+    # Points with u^ρ < x₁^ρ are not on the curve; mark them NaN so they are not drawn
+    base = u**rho - x1**rho
+    x2 = np.where(base >= 0, base, np.nan)**(1/rho)
+    for level, curve in zip(utility_levels, x2):
+        ax.plot(x1, curve, '--', label=f'U={level}')
     ax.set_title('CES\nU = (x₁ᵖ + x₂ᵖ)^(1/ρ)')
     
     # MODIFY: Change axis limits for CES plot
@@ -50,10 +54,10 @@ def plot_utility_comparisons():
     # MODIFY: Change utility function form
     # Current: U = x₁ + ln(x₂)
     # Could modify to: U = x₁ + x₂^0.5 or other forms
-    for u in utility_levels:
-        # MODIFY: Change function here for different quasilinear forms
-        x2 = np.exp(u - x1)
-        ax.plot(x1, x2, '--', label=f'U={u}')
+    # MODIFY: Change function here for different quasilinear forms
+    x2 = np.exp(u - x1)
+    for level, curve in zip(utility_levels, x2):
+        ax.plot(x1, curve, '--', label=f'U={level}')
     ax.set_title('Quasilinear\nU = x₁ + ln(x₂)')
     
     # MODIFY: Change axis limits for Quasilinear plot
@@ -1,4 +1,7 @@
 # inventory.py
+import operator
+import numpy as np
+
 class Inventory:
     def __init__(self, holding_cost, max_capacity, spoilage_rate, min_stock_level, storage_cost_factor):
         self.holding_cost = holding_cost
@@ -14,4 +17,45 @@ class Inventory:
 
     def remove_stock(self, quantity):
         """Remove stock from inventory"""
-        self.current_stock = max(0, self.current_stock - quantity)
\ No newline at end of file
+        self.current_stock = max(0, self.current_stock - quantity)
+
+# Inventory attributes gathered by InventoryArray.from_inventories, current stock last
+_gather = operator.attrgetter(
+    'holding_cost', 'max_capacity', 'spoilage_rate', 'min_stock_level', 'storage_cost_factor',
+    'current_stock'
+)
+
+class InventoryArray:
+    """Inventory state for many firms held as parallel NumPy arrays of one dtype (one slot per firm)"""
+    def __init__(self, holding_cost, max_capacity, spoilage_rate, min_stock_level, storage_cost_factor,
+                 dtype=np.float64):
+        self.holding_cost = np.asarray(holding_cost, dtype=dtype)
+        self.max_capacity = np.asarray(max_capacity, dtype=dtype)
+        self.spoilage_rate = np.asarray(spoilage_rate, dtype=dtype)
+        self.min_stock_level = np.asarray(min_stock_level, dtype=dtype)
+        self.storage_cost_factor = np.asarray(storage_cost_factor, dtype=dtype)
+        self.current_stock = np.zeros_like(self.max_capacity)
+
+    @classmethod
+    def from_inventories(cls, inventories, dtype=np.float64):
+        """Build an InventoryArray from a sequence of Inventory objects, keeping their order"""
+        inventories = list(inventories)
+        # One pass over the inventories gathers every field; each array is a contiguous row
+        state = np.array([_gather(inv) for inv in inventories], dtype=dtype)
+        (holding_cost, max_capacity, spoilage_rate, min_stock_level, storage_cost_factor,
+         current_stock) = state.reshape(len(inventories), 6).T.copy()
+        inv_array = cls(
+            holding_cost=holding_cost,
+            max_capacity=max_capacity,
+            spoilage_rate=spoilage_rate,
+            min_stock_level=min_stock_level,
+            storage_cost_factor=storage_cost_factor,
+            dtype=dtype
+        )
+        inv_array.current_stock[:] = current_stock
+        return inv_array
+
+    def write_back(self, inventories):
+        """Copy current stock levels back onto the matching Inventory objects"""
+        for inv, stock in zip(inventories, self.current_stock.tolist()):
+            inv.current_stock = stock
@@ -119,7 +119,8 @@ def main():
     # Create and add firms to market
     for firm_config in firms_config:
         try:
-            firm = Firm(firm_config['name'], firm_config['params'])
+            firm = Firm(firm_config['name'], firm_config['params'],
+                        max_periods=market_params['max_periods'])
             market.add_firm(firm)
         except ValueError as e:
             print(f"Error creating firm {firm_config['name']}: {e}")
@@ -6,35 +6,54 @@ Created on Thu Dec 26 13:33:55 2024
 @author: deowulf
 """
 
+import functools
+import linecache
 import numpy as np
 from sympy import symbols, diff, lambdify
 
-def marginal_cost_numerical(x, fixed_cost=0, variable_cost_fn=None, h=0.0001):
+# Relative step balancing truncation and round-off error for central differences
+_CENTRAL_DIFF_STEP = np.finfo(float).eps ** (1 / 3)
+
+def marginal_cost_numerical(x, fixed_cost=0, variable_cost_fn=None, h=None):
     """
     Calculate marginal cost using numerical differentiation
-    MC(x) = dC/dx ≈ [C(x+h) - C(x)]/h
+    MC(x) = dC/dx ≈ [C(x+h) - C(x-h)]/(2h), or the forward difference
+    [C(x+h) - C(x)]/h where x - h < 0 so C is not evaluated below zero
+    The default linear variable cost is differentiated analytically.
     
     Parameters:
-    x (float): Quantity
+    x (float or np.ndarray): Quantity
     fixed_cost (float): Fixed costs
     variable_cost_fn (function): Variable cost function
-    h (float): Small increment for numerical differentiation
+    h (float): Small increment for numerical differentiation; by default
+               scaled to the magnitude of x, h = max(1, |x|) * eps^(1/3)
     """
     if variable_cost_fn is None:
-        variable_cost_fn = lambda x: x
+        # Default variable cost VC(x) = x has the closed-form derivative 1
+        if np.ndim(x) == 0:
+            return 1.0
+        return np.ones_like(np.asarray(x, dtype=float))
+    
+    if h is None:
+        h = np.maximum(1.0, np.abs(x)) * _CENTRAL_DIFF_STEP
         
-    # Calculate total cost at x and x+h
-    c_x = fixed_cost + variable_cost_fn(x)
+    # Calculate total cost either side of x
+    one_sided = np.asarray(x) - h < 0
     c_xh = fixed_cost + variable_cost_fn(x + h)
+    c_xmh = fixed_cost + variable_cost_fn(np.where(one_sided, x, x - h))
     
-    # Numerical derivative
-    mc = (c_xh - c_x) / h
-    return mc
+    # Central-difference derivative, O(h^2) truncation error (O(h) where one-sided)
+    mc = (c_xh - c_xmh) / np.where(one_sided, h, 2 * h)
+    return mc[()]
 
 # Analytical approach using SymPy
+@functools.lru_cache(maxsize=1)
 def create_marginal_cost_function():
     """
     Create an analytical marginal cost function using symbolic differentiation
+    
+    The function is built once and cached; the returned callable is stateless
+    and safe to reuse across calls.
     """
     # Define symbolic variable
     x = symbols('x')
@@ -48,6 +67,8 @@ def create_marginal_cost_function():
     
     # Convert to numerical function
     mc_function = lambdify(x, marginal_cost)
+    # lambdify registers its generated source with linecache; release it
+    linecache.clearcache()
     
     return mc_function
 
@@ -77,11 +98,11 @@ def plot_cost_curves(x_range):
     plt.legend()
     plt.show()
 
-# Plot the curves
-plot_cost_curves([1, 10])
-
 # Example usage:
 if __name__ == "__main__":
+    # Plot the curves
+    plot_cost_curves([1, 10])
+    
     # Example with quadratic variable costs
     quad_cost = lambda x: x**2
     
@@ -1,9 +1,65 @@
 # market.py
+from collections import deque
 from demand import Demand
+from firm import FirmPool
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from numba_compat import NUMBA_AVAILABLE
+import market_kernels
+
+# Prefer the ahead-of-time build (see build_native.py); otherwise compile
+# eagerly at import with Numba. Kernels are looked up by array dtype.
+_FLOAT_TYPES = {'f4': np.dtype(np.float32), 'f8': np.dtype(np.float64)}
+try:
+    import _market_native
+    _KERNELS = {
+        dtype: {name: getattr(_market_native, f'{name}_{t}') for name in market_kernels.KERNELS}
+        for t, dtype in _FLOAT_TYPES.items()
+    }
+except ImportError:
+    if NUMBA_AVAILABLE:
+        for name, signatures in market_kernels.SIGNATURES.items():
+            for signature in signatures.values():
+                market_kernels.KERNELS[name].compile(signature)
+    _KERNELS = {dtype: market_kernels.KERNELS for dtype in _FLOAT_TYPES.values()}
+
+# FirmPool arrays stacked into (scenarios, firms) by simulate_scenarios
+_POOL_FIELDS = (
+    'capital', 'capacity', 'efficiency', 'max_efficiency', 'upgrade_cost_factor',
+    'maintenance_cost_factor', 'variable_cost_per_unit', 'overhead_ratio', 'fixed_costs',
+    'risk_tolerance', 'min_profit_margin', 'total_costs', 'target_margin_mult',
+    'production_ratio', 'capacity_investment_ratio', 'efficiency_investment_ratio'
+)
+
+# Market phase lookup: row is concentration level, column is price trend bucket
+MARKET_PHASES = np.array([
+    ["Price War", "Stable Competition", "Competitive Growth"],
+    ["Market Correction", "Stable Oligopoly", "Monopolistic Growth"]
+])
+HIGH_CONCENTRATION_HHI = 2500
+# A trend of exactly ±5% counts as stable, hence the nudged upper bound with side='right'
+PRICE_TREND_THRESHOLDS = np.array([-0.05, np.nextafter(0.05, np.inf)])
 
 class Market:
-    def __init__(self, params):
+    PRICE_TREND_PERIODS = 5  # Default window of get_price_trend
+
+    def __init__(self, params, dtype=np.float64):
+        """
+        Args:
+            params (dict): Market parameters (demand, market_type, max_periods)
+            dtype: Float type of the firm state arrays and metric series;
+                   np.float32 halves memory traffic for large firm counts
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in _KERNELS:
+            raise ValueError(f"Unsupported dtype {self.dtype}; use float32 or float64")
+        kernels = _KERNELS[self.dtype]
+        self._decide = kernels['decide_production']
+        self._produce = kernels['produce']
+        self._clear = kernels['clear']
+        self._invest = kernels['make_investments']
         demand_params = params['demand']
         self.demand = Demand(
             base_price=demand_params['base_price'],
@@ -11,6 +67,8 @@ class Market:
             min_price=demand_params['min_price'],
             seasonal_factors=demand_params.get('seasonal_factors')
         )
+        # Bound once; the demand curve is evaluated on every period
+        self._demand_price = self.demand.get_market_price
         self.firms = []
         self.market_type = params['market_type']
         self.max_periods = params['max_periods']
@@ -18,164 +76,274 @@ class Market:
         self.total_market_value = 0
         self.price_history = []
         self.periods = []
-        self.firm_metrics = {}  # Store metrics for each firm
+        # Per-firm metric series, one row per firm and one column per period;
+        # max_periods is only the initial capacity (see _reserve_metrics)
+        self._metrics = {
+            key: np.zeros((0, self.max_periods), dtype=self.dtype)
+            for key in ('revenue', 'costs', 'market_price')
+        }
+        self._metric_rows = {}  # Firm name -> row of _metrics
+        self._pool = None  # Struct-of-arrays view of firm state (see _sync_soa)
+        self._pending_production = []  # Production rows not yet recorded on firms
+        self._total_supply = 0.0  # Total firm stock during a run; queries read the firms instead
+        self._price_cache = None  # (period, total_supply, price) of the last demand evaluation
+        # Rolling window of the last relative price changes and their sum, for get_price_trend
+        self._ret_window = deque(maxlen=self.PRICE_TREND_PERIODS - 1)
+        self._ret_sum = 0.0
 
     def add_firm(self, firm):
         """Add a firm to the market and initialize its metrics"""
         self.firms.append(firm)
-        self.firm_metrics[firm.name] = {
-            'revenue': [],
-            'costs': [],
-            'profits': [],
-            'market_price': []
-        }
+        self._reserve_metrics(len(self.firms), 0)
+        self._metric_rows[firm.name] = len(self.firms) - 1
+
+    def _reserve_metrics(self, n_firms, n_periods):
+        """Grow the metric arrays to hold at least n_firms rows and n_periods columns"""
+        rows, columns = self._metrics['costs'].shape
+        if n_firms <= rows and n_periods <= columns:
+            return
+        shape = (max(n_firms, 2 * rows) if n_firms > rows else rows,
+                 max(n_periods, 2 * columns) if n_periods > columns else columns)
+        for key, values in self._metrics.items():
+            grown = np.zeros(shape, dtype=self.dtype)
+            grown[:rows, :columns] = values
+            self._metrics[key] = grown
 
-    def calculate_market_share(self):
+    def _firm_stock(self):
+        """Current stock of each firm as an array ordered like self.firms"""
+        return np.array([firm.inventory.current_stock for firm in self.firms], dtype=self.dtype)
+
+    def get_market_share_array(self, stock=None):
+        """Market share of each firm as an array ordered like self.firms"""
+        if stock is None:
+            stock = self._firm_stock()
+        total_supply = stock.sum()
+        if total_supply == 0:
+            return np.zeros_like(stock)
+        return stock / total_supply
+
+    def calculate_market_share(self, shares=None):
         """Calculate market share for each firm"""
-        total_sales = sum(firm.inventory.current_stock for firm in self.firms)
-        if total_sales == 0:
-            return {firm.name: 0 for firm in self.firms}
-        return {
-            firm.name: firm.inventory.current_stock / total_sales 
-            for firm in self.firms
-        }
+        if shares is None:
+            shares = self.get_market_share_array()
+        return dict(zip((firm.name for firm in self.firms), shares.tolist()))
 
-    def calculate_market_concentration(self):
+    def calculate_market_concentration(self, shares=None):
         """Calculate Herfindahl-Hirschman Index (HHI) for market concentration"""
-        market_shares = self.calculate_market_share()
-        return sum(share * share * 10000 for share in market_shares.values())
+        if shares is None:
+            shares = self.get_market_share_array()
+        return 10000.0 * float(np.dot(shares, shares))
 
     def get_market_stats(self):
         """Get current market statistics"""
-        total_supply = sum(firm.inventory.current_stock for firm in self.firms)
-        market_price = self.demand.get_market_price(total_supply)
+        # One stock gather serves the supply and the shares
+        stock = self._firm_stock()
+        total_supply = float(stock.sum())
+        market_price = self._market_price(total_supply)
+        shares = self.get_market_share_array(stock)
         return {
             'total_supply': total_supply,
             'market_price': market_price,
             'total_market_value': self.total_market_value,
-            'market_concentration': self.calculate_market_concentration(),
-            'market_shares': self.calculate_market_share()
+            'market_concentration': self.calculate_market_concentration(shares),
+            'market_shares': self.calculate_market_share(shares)
         }
 
+    def _market_price(self, total_supply):
+        """Demand price for total_supply in the current period, reusing the last evaluation if it matches"""
+        key = (self.current_period, total_supply)
+        if self._price_cache is not None and self._price_cache[:2] == key:
+            return self._price_cache[2]
+        market_price = self._demand_price(total_supply)
+        self._price_cache = key + (market_price,)
+        return market_price
+
+    def get_total_supply(self):
+        """Total stock held by all firms"""
+        return float(self._firm_stock().sum())
+
+    def _sync_soa(self):
+        """
+        Gather per-firm state into NumPy arrays cached on the market
+        
+        Called at the start of every simulate_period and run, so changes made
+        to the firm objects between calls always take effect.
+        """
+        self._pool = FirmPool(self.firms, dtype=self.dtype)
+        self._total_supply = float(self._pool.inventory.current_stock.sum())
+        self._pending_production = []
+
+    def _write_back_soa(self):
+        """Mirror the array state back onto the firm objects"""
+        self._pool.write_back(self.firms)
+        for row in self._pending_production:
+            for firm, production in zip(self.firms, row.tolist()):
+                firm.record_production(production)
+        self._pending_production = []
+
     def simulate_period(self):
         """Simulate one period of market activity"""
-        # Get current market conditions
-        total_supply = sum(firm.inventory.current_stock for firm in self.firms)
-        market_price = self.demand.get_market_price(total_supply)
-        
-        # Track this period
-        self.periods.append(self.current_period)
-        self.price_history.append(market_price)
+        self._sync_soa()
+        self._step()
+        self._write_back_soa()
+
+    def run(self, n_periods=None):
+        """
+        Simulate several periods, syncing firm objects only before and after the run
         
-        market_data = {
-            'price': market_price,
-            'total_supply': total_supply,
-            'period': self.current_period
-        }
+        Args:
+            n_periods (int): Number of periods to simulate; defaults to the
+                             periods remaining before max_periods
+        """
+        if n_periods is None:
+            n_periods = max(0, self.max_periods - self.current_period)
+        self._sync_soa()
+        for _ in range(n_periods):
+            self._step()
+        self._write_back_soa()
 
-        # Production phase
-        for firm in self.firms:
-            # Make production decisions
-            production_qty = firm.make_production_decision(market_data)
-            
-            # Calculate production costs
-            production_cost = (
-                (firm.costs.variable_cost_per_unit / firm.production.efficiency) * production_qty +
-                firm.costs.fixed_costs +
-                firm.production.calculate_maintenance_cost()
-            )
-            
-            if production_cost <= firm.capital:
-                firm.inventory.add_stock(production_qty)
-                firm.capital -= production_cost
-                self.firm_metrics[firm.name]['costs'].append(production_cost)
-            else:
-                self.firm_metrics[firm.name]['costs'].append(0)
+    def _step(self):
+        """Advance the array state by one period"""
+        market_price = self._begin_period()
+        pool = self._pool
+        inventory = pool.inventory
+
+        # Production phase: only firms that can afford the full cost produce
+        production_qty = pool.decide_production(market_price, self._decide)
+        self._pending_production.append(production_qty)
+        costs = self._produce(
+            production_qty, pool.capital, inventory.current_stock, inventory.max_capacity,
+            pool.variable_cost_per_unit, pool.efficiency, pool.fixed_costs,
+            pool.capacity, pool.maintenance_cost_factor
+        )
 
         # Market clearing and sales phase
-        total_supply = sum(firm.inventory.current_stock for firm in self.firms)
+        self._total_supply = float(inventory.current_stock.sum())
         market_value = 0
         
-        if total_supply > 0:
-            market_price = self.demand.get_market_price(total_supply)
+        if self._total_supply > 0:
+            market_price = self._market_price(self._total_supply)
+            revenue = self._clear(pool.capital, inventory.current_stock, self.dtype.type(market_price))
+            market_value = float(revenue.sum())
+            self._total_supply = 0.0
             
-            for firm in self.firms:
-                # Calculate market share and sales
-                market_share = firm.inventory.current_stock / total_supply
-                sales_qty = min(firm.inventory.current_stock, market_share * total_supply)
-                revenue = sales_qty * market_price
-                
-                # Update firm state
-                firm.inventory.remove_stock(sales_qty)
-                firm.capital += revenue
-                market_value += revenue
-                
-                # Apply inventory holding costs
-                holding_cost = firm.inventory.current_stock * firm.inventory.holding_cost
-                firm.capital -= holding_cost
-                
-                # Track metrics
-                self.firm_metrics[firm.name]['revenue'].append(revenue)
-                self.firm_metrics[firm.name]['profits'].append(
-                    revenue - self.firm_metrics[firm.name]['costs'][-1]
-                )
-                self.firm_metrics[firm.name]['market_price'].append(market_price)
-                
-                # Investment phase
-                firm.make_investment_decisions(market_price)
+            # Investment phase
+            pool.make_investment_decisions(self._invest)
         else:
             # No supply - record zeros
-            for firm in self.firms:
-                self.firm_metrics[firm.name]['revenue'].append(0)
-                self.firm_metrics[firm.name]['profits'].append(
-                    -self.firm_metrics[firm.name]['costs'][-1]
-                )
-                self.firm_metrics[firm.name]['market_price'].append(market_price)
+            revenue = np.zeros_like(costs)
+
+        self._end_period(costs, revenue, market_price, market_value)
+
+    def _begin_period(self):
+        """Price the opening supply and record it; returns the market price"""
+        # Get current market conditions
+        market_price = self._market_price(self._total_supply)
+        
+        # Track this period
+        self.periods.append(self.current_period)
+        self._record_price_change(market_price)
+        self.price_history.append(market_price)
+        return market_price
+
+    def _end_period(self, costs, revenue, market_price, market_value):
+        """Record the period's per-firm metrics and move to the next period"""
+        # Track metrics
+        t = self.current_period
+        n = len(self.firms)
+        self._reserve_metrics(n, t + 1)
+        self._metrics['costs'][:n, t] = costs
+        self._metrics['revenue'][:n, t] = revenue
+        self._metrics['market_price'][:n, t] = market_price
 
         # Update market state
         self.total_market_value = market_value
         self.current_period += 1
         self.demand.advance_period()
 
+    @property
+    def firm_metrics(self):
+        """Simulated periods of every metric, keyed by firm name and then metric"""
+        n = self.current_period
+        return {
+            firm_name: {key: values[row, :n] for key, values in self._metrics.items()}
+            for firm_name, row in self._metric_rows.items()
+        }
+
+    def get_firm_series(self, key):
+        """Simulated periods of one metric ('revenue', 'costs', 'market_price') per firm"""
+        values = self._metrics[key][:, :self.current_period]
+        return {firm_name: values[row] for firm_name, row in self._metric_rows.items()}
+
+    @property
+    def profits(self):
+        """Per-firm profit series, computed as revenue - costs over the whole history"""
+        n = self.current_period
+        profits = self._metrics['revenue'][:, :n] - self._metrics['costs'][:, :n]
+        return {firm_name: profits[row] for firm_name, row in self._metric_rows.items()}
+
+    def _plot_firm_series(self, ax, series, label):
+        """Draw one series per firm as a single LineCollection"""
+        periods = np.asarray(self.periods, dtype=np.float64)
+        colors = [f'C{i}' for i in range(len(series))]
+        segments = [np.column_stack([periods, values]) for values in series.values()]
+        ax.add_collection(LineCollection(segments, colors=colors))
+        ax.autoscale_view()
+        # Lightweight proxy handles give the legend one entry per firm
+        ax.legend(handles=[
+            Line2D([], [], color=color, label=f'{firm_name} {label}')
+            for firm_name, color in zip(series, colors)
+        ])
+
     def plot_metrics(self):
         """Plot all firms' metrics"""
         plt.figure(figsize=(15, 10))
         
         # Plot revenues
         plt.subplot(3, 1, 1)
-        for firm_name, metrics in self.firm_metrics.items():
-            plt.plot(self.periods, metrics['revenue'], label=f'{firm_name} Revenue')
+        self._plot_firm_series(plt.gca(), self.get_firm_series('revenue'), 'Revenue')
         plt.title('Firm Revenues Over Time')
         plt.xlabel('Period')
         plt.ylabel('Revenue')
         plt.grid(True)
-        plt.legend()
         
         # Plot costs
         plt.subplot(3, 1, 2)
-        for firm_name, metrics in self.firm_metrics.items():
-            plt.plot(self.periods, metrics['costs'], label=f'{firm_name} Costs')
+        self._plot_firm_series(plt.gca(), self.get_firm_series('costs'), 'Costs')
         plt.title('Firm Costs Over Time')
         plt.xlabel('Period')
         plt.ylabel('Costs')
         plt.grid(True)
-        plt.legend()
         
         # Plot profits
         plt.subplot(3, 1, 3)
-        for firm_name, metrics in self.firm_metrics.items():
-            plt.plot(self.periods, metrics['profits'], label=f'{firm_name} Profits')
+        self._plot_firm_series(plt.gca(), self.profits, 'Profits')
         plt.title('Firm Profits Over Time')
         plt.xlabel('Period')
         plt.ylabel('Profits')
         plt.grid(True)
-        plt.legend()
         
         plt.tight_layout()
         plt.show()
 
-    def get_price_trend(self, periods=5):
+    def _record_price_change(self, market_price):
+        """Push the relative change to market_price into the rolling trend window"""
+        if not self.price_history:
+            return
+        prev = self.price_history[-1]
+        change = (market_price - prev) / prev if prev else 0.0
+        if len(self._ret_window) == self._ret_window.maxlen:
+            self._ret_sum -= self._ret_window[0]
+        self._ret_window.append(change)
+        self._ret_sum += change
+
+    def get_price_trend(self, periods=PRICE_TREND_PERIODS):
         """Calculate price trend over the last n periods"""
+        if periods == self.PRICE_TREND_PERIODS:
+            # O(1) from the rolling window maintained by _step
+            if not self._ret_window:
+                return 0
+            return self._ret_sum / len(self._ret_window)
         if len(self.price_history) < 2:
             return 0
         recent_prices = self.price_history[-periods:]
@@ -187,43 +355,117 @@ class Market:
         ]
         return sum(price_changes) / len(price_changes)
 
-    def get_market_phase(self):
+    @staticmethod
+    def classify_market_phase(concentration, price_trend):
+        """
+        Look up market phases for scalar or array inputs without branching
+        
+        Rows are competitive / high concentration (HHI > 2500); columns are
+        falling (< -5%), stable and rising (> +5%) price trends.
+        """
+        conc_idx = np.asarray(concentration) > HIGH_CONCENTRATION_HHI
+        trend_idx = np.searchsorted(PRICE_TREND_THRESHOLDS, price_trend, side='right')
+        return MARKET_PHASES[conc_idx.astype(np.intp), trend_idx]
+
+    def get_market_phase(self, shares=None):
         """Determine current market phase based on price trends and concentration"""
         price_trend = self.get_price_trend()
-        concentration = self.calculate_market_concentration()
-        
-        if concentration > 2500:  # High concentration
-            if price_trend > 0.05:
-                return "Monopolistic Growth"
-            elif price_trend < -0.05:
-                return "Market Correction"
-            else:
-                return "Stable Oligopoly"
-        else:  # Competitive market
-            if price_trend > 0.05:
-                return "Competitive Growth"
-            elif price_trend < -0.05:
-                return "Price War"
-            else:
-                return "Stable Competition"
+        concentration = self.calculate_market_concentration(shares)
+        return str(self.classify_market_phase(concentration, price_trend))
 
     def get_performance_report(self):
         """Generate a performance report for all firms"""
+        shares = self.get_market_share_array()
         report = {
-            'market_phase': self.get_market_phase(),
+            'market_phase': self.get_market_phase(shares),
             'total_market_value': self.total_market_value,
             'average_price': sum(self.price_history) / len(self.price_history) if self.price_history else 0,
             'price_volatility': self.get_price_trend(),
             'firms': {}
         }
         
-        for firm in self.firms:
+        for firm, share in zip(self.firms, shares.tolist()):
             report['firms'][firm.name] = {
                 'capital': firm.capital,
-                'market_share': self.calculate_market_share()[firm.name],
+                'market_share': share,
                 'production_capacity': firm.production.capacity,
                 'efficiency': firm.production.efficiency,
                 'inventory_level': firm.inventory.current_stock
             }
             
-        return report
\ No newline at end of file
+        return report
+
+
+def simulate_scenarios(markets, n_periods=None):
+    """
+    Run independent markets, e.g. a parameter sweep, side by side
+    
+    The firm state of all markets is stacked into (scenarios, firms) arrays
+    and each period's production, sales and investment run for every
+    scenario in parallel. Demand is still evaluated per market. Each market
+    ends in the same state as after its own run(n_periods).
+    
+    Args:
+        markets (list): Market objects with the same number of firms and dtype
+        n_periods (int): Number of periods to simulate; defaults to the fewest
+                         periods any market has left before max_periods
+    """
+    markets = list(markets)
+    if not markets:
+        return
+    if len({len(market.firms) for market in markets}) > 1:
+        raise ValueError("All markets must have the same number of firms")
+    if len({market.dtype for market in markets}) > 1:
+        raise ValueError("All markets must use the same dtype")
+    if n_periods is None:
+        n_periods = max(0, min(market.max_periods - market.current_period for market in markets))
+
+    for market in markets:
+        market._sync_soa()
+    pools = [market._pool for market in markets]
+    inventories = [pool.inventory for pool in pools]
+    state = {name: np.stack([getattr(pool, name) for pool in pools]) for name in _POOL_FIELDS}
+    stock = np.stack([inventory.current_stock for inventory in inventories])
+    max_stock = np.stack([inventory.max_capacity for inventory in inventories])
+    # Point every pool at its row of the stacked state so write_back sees the results
+    for s, pool in enumerate(pools):
+        for name in _POOL_FIELDS:
+            setattr(pool, name, state[name][s])
+        pool.inventory.current_stock = stock[s]
+        pool.inventory.max_capacity = max_stock[s]
+
+    prices = np.empty(len(markets), dtype=markets[0].dtype)
+    for _ in range(n_periods):
+        market_prices = [market._begin_period() for market in markets]
+        prices[:] = market_prices
+        quantity, costs, supply = market_kernels.produce_scenarios(
+            prices, state['capital'], stock, max_stock, state['capacity'], state['efficiency'],
+            state['variable_cost_per_unit'], state['overhead_ratio'], state['fixed_costs'],
+            state['maintenance_cost_factor'], state['target_margin_mult'],
+            state['min_profit_margin'], state['production_ratio'], state['risk_tolerance']
+        )
+
+        # Market clearing price for each scenario that has supply
+        sold = supply > 0
+        for s, market in enumerate(markets):
+            market._pending_production.append(quantity[s])
+            market._total_supply = float(supply[s])
+            if sold[s]:
+                market_prices[s] = market._market_price(market._total_supply)
+        prices[:] = market_prices
+        revenue = market_kernels.clear_scenarios(
+            prices, sold, state['capital'], stock, state['capacity'], state['efficiency'],
+            state['max_efficiency'], state['upgrade_cost_factor'], state['fixed_costs'],
+            state['capacity_investment_ratio'], state['efficiency_investment_ratio'],
+            state['total_costs']
+        )
+
+        for s, market in enumerate(markets):
+            market_value = 0
+            if sold[s]:
+                market_value = float(revenue[s].sum())
+                market._total_supply = 0.0
+            market._end_period(costs[s], revenue[s], market_prices[s], market_value)
+
+    for market in markets:
+        market._write_back_soa()
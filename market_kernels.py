@@ -0,0 +1,118 @@
+# market_kernels.py
+"""
+Numeric kernels for Market's per-period update over firm arrays.
+
+The firm decisions and costs come from firm_kernels, so Firm, FirmPool and
+these kernels share one copy of each rule. The per-period kernels are JIT-compiled with Numba for the
+signatures below; market.py prefers the ahead-of-time compiled versions from
+the _market_native extension when build_native.py has been run. Without Numba
+they run as plain NumPy code. Demand is an arbitrary Python object, so the
+market price is computed by the caller between the production and sales
+kernels.
+
+The *_scenarios kernels do the same work for a batch of independent markets
+held as (scenarios, firms) arrays, one scenario per prange iteration. They
+call the same per-firm kernels as the sequential step, so batched and
+sequential runs agree exactly.
+"""
+import numpy as np
+from numba_compat import njit, numpy_fallback, prange
+from firm_kernels import decide_production, make_investments, production_cost
+
+# Numba type signatures of the per-period kernels, shared by the JIT and AOT
+# builds and keyed by kernel name, then float type code; {a} is an array
+# argument and {s} a scalar
+SIGNATURES = {
+    name: {t: template.format(a=f'{t}[:]', s=t) for t in ('f4', 'f8')}
+    for name, template in {
+        'decide_production': '{a}({s}' + ', {a}' * 12 + ')',
+        'produce': '{a}({a}' + ', {a}' * 8 + ')',
+        'clear': '{a}({a}, {a}, {s})',
+        'make_investments': 'void({a}' + ', {a}' * 8 + ')'
+    }.items()
+}
+
+def _produce_numpy(quantity, capital, stock, max_stock, var_cost, efficiency, fixed, capacity, maint_factor):
+    """produce over whole arrays"""
+    cost = production_cost(quantity, var_cost, efficiency, fixed, capacity, maint_factor)
+    # Only firms that can afford the full cost produce
+    affordable = cost <= capital
+    # zeros_like keeps the input dtype so float32 arrays stay float32
+    stock[:] = np.minimum(stock + np.where(affordable, quantity, np.zeros_like(quantity)), max_stock)
+    costs = np.where(affordable, cost, np.zeros_like(cost))
+    capital -= costs
+    return costs
+
+@numpy_fallback(_produce_numpy)
+@njit(cache=True, fastmath=True)
+def produce(quantity, capital, stock, max_stock, var_cost, efficiency, fixed, capacity, maint_factor):
+    """Charge production costs, add affordable output to stock; returns costs per firm"""
+    costs = np.zeros_like(quantity)
+    for i in range(quantity.shape[0]):
+        cost = production_cost(quantity[i], var_cost[i], efficiency[i], fixed[i], capacity[i], maint_factor[i])
+        # Only firms that can afford the full cost produce
+        if cost <= capital[i]:
+            stock[i] = min(stock[i] + quantity[i], max_stock[i])
+            capital[i] -= cost
+            costs[i] = cost
+    return costs
+
+@njit(cache=True, fastmath=True)
+def clear(capital, stock, market_price):
+    """Sell all stock at the market price; returns revenue per firm"""
+    # Each firm's share of supply times total supply is its whole stock, so the
+    # market clears every inventory and no holding cost is left to charge
+    revenue = stock * market_price
+    capital += revenue
+    stock[:] = 0.0
+    return revenue
+
+# Kernels Market runs each period, by the names used in SIGNATURES
+KERNELS = {
+    'decide_production': decide_production,
+    'produce': produce,
+    'clear': clear,
+    'make_investments': make_investments
+}
+
+@njit(parallel=True, cache=True)
+def produce_scenarios(market_price, capital, stock, max_stock, capacity, efficiency, var_cost,
+                      overhead, fixed, maint_factor, margin_mult, min_margin, prod_ratio, risk):
+    """
+    Production decisions and produce() for every scenario of a batch
+    
+    market_price holds each scenario's opening price. Returns production
+    quantity and costs per firm and the total supply of each scenario.
+    """
+    quantity = np.empty_like(capital)
+    costs = np.empty_like(capital)
+    supply = np.empty(capital.shape[0], dtype=capital.dtype)
+    for s in prange(capital.shape[0]):
+        quantity[s] = decide_production(
+            market_price[s], capital[s], stock[s], max_stock[s], capacity[s], efficiency[s],
+            var_cost[s], overhead[s], fixed[s], margin_mult[s], min_margin[s], prod_ratio[s], risk[s]
+        )
+        costs[s] = produce(
+            quantity[s], capital[s], stock[s], max_stock[s], var_cost[s], efficiency[s],
+            fixed[s], capacity[s], maint_factor[s]
+        )
+        supply[s] = stock[s].sum()
+    return quantity, costs, supply
+
+@njit(parallel=True, cache=True)
+def clear_scenarios(market_price, sold, capital, stock, capacity, efficiency, max_efficiency,
+                    upgrade_cost, fixed, capacity_ratio, efficiency_ratio, total_costs):
+    """
+    clear() and investment for every scenario of a batch where sold is set
+    
+    Scenarios without supply are left untouched. Returns revenue per firm.
+    """
+    revenue = np.zeros_like(capital)
+    for s in prange(capital.shape[0]):
+        if sold[s]:
+            revenue[s] = clear(capital[s], stock[s], market_price[s])
+            make_investments(
+                capital[s], capacity[s], efficiency[s], max_efficiency[s], upgrade_cost[s],
+                fixed[s], capacity_ratio[s], efficiency_ratio[s], total_costs[s]
+            )
+    return revenue
@@ -0,0 +1,36 @@
+# numba_compat.py
+"""
+Optional Numba support.
+
+Numba is not required to run the models. When it is not installed, ``njit``
+and ``vectorize`` become no-op decorators and ``prange`` falls back to
+``range``, so the kernels run as plain Python/NumPy code. Kernels that loop
+over array elements are slow when interpreted; ``numpy_fallback`` swaps them
+for whole-array NumPy versions in that case.
+"""
+try:
+    from numba import njit, vectorize, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def _passthrough(*args, **kwargs):
+        # Support both bare ``@njit`` and ``@njit(...)`` usage
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+    njit = _passthrough
+    vectorize = _passthrough
+
+def numpy_fallback(numpy_fn):
+    """
+    Use numpy_fn in place of the decorated loop kernel when Numba is not installed
+    
+    numpy_fn must compute the same result as the kernel with whole-array
+    NumPy operations.
+    """
+    def choose(kernel):
+        return kernel if NUMBA_AVAILABLE else numpy_fn
+    return choose
@@ -9,6 +9,12 @@ Created on Thu Dec 26 12:52:25 2024
 import numpy as np
 import matplotlib.pyplot as plt
 
+def _plot_curves(ax, x1, X2, utility_levels):
+    """Draw one dashed indifference curve per row of X2 in a single plot call"""
+    lines = ax.plot(x1, X2.T, '--')
+    for line, u in zip(lines, utility_levels):
+        line.set_label(f'U={u}')
+
 def plot_economic_scenarios():
     fig, axes = plt.subplots(2, 2, figsize=(15, 15))
     
@@ -16,12 +22,14 @@ def plot_economic_scenarios():
     ax = axes[0,0]
     x1 = np.linspace(0.1, 10, 100)
     utility_levels = [2, 4, 6, 8, 10]
+    # Broadcast utility levels (rows) against x₁ (columns): each curve family is one array
+    U = np.array(utility_levels, dtype=float)[:, None]
+    X1 = x1[None, :]
     
     # Strong preference for good 1
     alpha, beta = 0.8, 0.2
-    for u in utility_levels:
-        x2 = np.exp((np.log(u) - alpha * np.log(x1)) / beta)
-        ax.plot(x1, x2, '--', label=f'U={u}')
+    X2 = np.exp((np.log(U) - alpha * np.log(X1)) / beta)
+    _plot_curves(ax, x1, X2, utility_levels)
     
     # Add budget constraint
     budget_x1 = np.linspace(0, 10, 100)
@@ -36,12 +44,10 @@ def plot_economic_scenarios():
     # Scenario 2: Nearly Perfect Complements (CES)
     ax = axes[0,1]
     rho = -5  # Very negative rho for strong complementarity
-    for u in utility_levels:
-        try:
-            x2 = (u**rho - x1**rho)**(1/rho)
-            ax.plot(x1, x2, '--', label=f'U={u}')
-        except:
-            continue
+    # Negative bases give NaN; silence the warning and mask those points
+    with np.errstate(invalid='ignore', divide='ignore'):
+        X2 = np.ma.masked_invalid((U**rho - X1**rho)**(1/rho))
+    _plot_curves(ax, x1, X2, utility_levels)
     
     ax.plot(budget_x1, budget_x2, 'r-', label='Budget')
     ax.set_title('Nearly Perfect Complements\nρ=-5')
@@ -52,9 +58,8 @@ def plot_economic_scenarios():
     # Scenario 3: Perfect Substitutes
     ax = axes[1,0]
     # Perfect substitutes: straight line indifference curves
-    for u in utility_levels:
-        x2 = (u - x1)  # U = x₁ + x₂
-        ax.plot(x1, x2, '--', label=f'U={u}')
+    X2 = U - X1  # U = x₁ + x₂
+    _plot_curves(ax, x1, X2, utility_levels)
     
     ax.plot(budget_x1, budget_x2, 'r-', label='Budget')
     ax.set_title('Perfect Substitutes\nU = x₁ + x₂')
@@ -67,13 +72,11 @@ def plot_economic_scenarios():
     # Stone-Geary with subsistence levels
     a, b = 2, 1  # Subsistence levels
     alpha, beta = 0.5, 0.5
-    for u in utility_levels:
-        # U = (x₁ - a)^α * (x₂ - b)^β
-        try:
-            x2 = b + (u/((x1-a)**alpha))**(1/beta)
-            ax.plot(x1[x1>a], x2[x1>a], '--', label=f'U={u}')
-        except:
-            continue
+    # U = (x₁ - a)^α * (x₂ - b)^β
+    with np.errstate(invalid='ignore', divide='ignore'):
+        X2 = np.ma.masked_invalid(b + (U/((X1-a)**alpha))**(1/beta))
+    above = x1 > a
+    _plot_curves(ax, x1[above], X2[:, above], utility_levels)
     
     ax.plot(budget_x1, budget_x2, 'r-', label='Budget')
     ax.axvline(x=a, color='g', linestyle=':', label='x₁ subsistence')
@@ -92,4 +95,6 @@ def plot_economic_scenarios():
     plt.tight_layout()
     return fig
 
-plot_economic_scenarios()
\ No newline at end of file
+if __name__ == "__main__":
+    plot_economic_scenarios()
+    plt.show()
@@ -6,31 +6,39 @@ Created on Thu Dec 26 13:18:03 2024
 
 @author: deowulf
 """
-from sympy import *
-import sympy as sp
 
-# Define our variables and constants
-t, x, m, hbar = symbols('t x m ħ')
-omega = Symbol('ω')
-psi = Function('ψ')(x, t)
-i = I
+# Precomputed output of derive_latex(), so importing this module never loads SymPy
+SCHRODINGER_LATEX = r"i ħ \frac{\partial}{\partial t} ψ{\left(x,t \right)} = 0.5 m x^{2} ω^{2} ψ{\left(x,t \right)} - \frac{ħ^{2} \frac{\partial^{2}}{\partial x^{2}} ψ{\left(x,t \right)}}{2 m}"
 
-# Set up Schrödinger equation
-V = (1/2) * m * omega**2 * x**2
-schrodinger = Eq(
-    i * hbar * diff(psi, t),
-    -((hbar**2)/(2*m)) * diff(psi, x, 2) + V*psi
-)
-
-# Print in LaTeX format
-print("LaTeX format:")
-print(latex(schrodinger))
-
-# For inline LaTeX
-print("\nInline LaTeX format:")
-print("$" + latex(schrodinger) + "$")
-
-# For display LaTeX (centered equation)
-print("\nDisplay LaTeX format:")
-print("\\[ " + latex(schrodinger) + " \\]")
+def derive_latex():
+    """Derive the Schrödinger equation for a harmonic potential and return it as LaTeX"""
+    from sympy import symbols, Symbol, Function, I, Eq, diff, latex
+    
+    # Define our variables and constants
+    t, x, m, hbar = symbols('t x m ħ')
+    omega = Symbol('ω')
+    psi = Function('ψ')(x, t)
+    i = I
+    
+    # Set up Schrödinger equation
+    V = (1/2) * m * omega**2 * x**2
+    schrodinger = Eq(
+        i * hbar * diff(psi, t),
+        -((hbar**2)/(2*m)) * diff(psi, x, 2) + V*psi
+    )
+    return latex(schrodinger)
 
+if __name__ == "__main__":
+    schrodinger_latex = derive_latex()
+    
+    # Print in LaTeX format
+    print("LaTeX format:")
+    print(schrodinger_latex)
+    
+    # For inline LaTeX
+    print("\nInline LaTeX format:")
+    print("$" + schrodinger_latex + "$")
+    
+    # For display LaTeX (centered equation)
+    print("\nDisplay LaTeX format:")
+    print("\\[ " + schrodinger_latex + " \\]")
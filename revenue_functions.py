@@ -6,6 +6,7 @@ Created on Thu Dec 26 13:34:42 2024
 
 @author: deowulf
 """
+from numba_compat import vectorize
 
 def revenue(x, price_function):
     """
@@ -21,8 +22,16 @@ def revenue(x, price_function):
     return price_function(x) * x
 
 # Example usage with a simple linear price function
+# Compiled to ufuncs when Numba is available, so both broadcast over arrays;
+# target='cpu' because 'parallel' only adds thread dispatch overhead at these sizes
+@vectorize(['float64(float64)'], target='cpu', cache=True)
 def price(x):
-    return 100 - 0.5*x  # Example: Price decreases linearly with quantity
+    return 100.0 - 0.5*x  # Example: Price decreases linearly with quantity
+
+@vectorize(['float64(float64)'], target='cpu', cache=True)
+def revenue_ufunc(x):
+    """Fused R(x) = P(x) * x for the example linear price function"""
+    return (100.0 - 0.5*x) * x
 
 # Calculate revenue for 10 units
 x = 10
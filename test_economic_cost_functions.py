@@ -0,0 +1,49 @@
+# test_economic_cost_functions.py
+import warnings
+import numpy as np
+import pytest
+from economic_cost_functions import EconomicCosts
+
+def test_closed_form_marginal_cost_matches_numerical():
+    econ = EconomicCosts()
+    x = np.array([0.0, 1.0, 2.5, 10.0])
+    np.testing.assert_allclose(econ.marginal_cost_vec(x), 2 + 2 * x)
+    np.testing.assert_allclose(econ.marginal_cost_vec(x), econ.marginal_cost_numerical(x), rtol=1e-4)
+    assert econ.marginal_cost(3) == 8.0
+    with pytest.raises(ValueError):
+        econ.marginal_cost(-1)
+
+def test_numerical_marginal_cost_at_zero_stays_in_domain():
+    econ = EconomicCosts()
+    econ.variable_cost_fn = np.sqrt
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        mc = econ.marginal_cost_vec(np.array([0.0, 1.0, 4.0]))
+    assert np.all(np.isfinite(mc))
+    np.testing.assert_allclose(mc[1:], 0.5 / np.sqrt([1.0, 4.0]), rtol=1e-6)
+
+def test_cost_grid_is_cached_and_read_only():
+    first = EconomicCosts().cost_grid()
+    second = EconomicCosts().cost_grid()
+    assert all(a is b for a, b in zip(first, second))
+    x, tc, ac, mc = first
+    np.testing.assert_allclose(tc, 100 + 2 * x + x**2)
+    np.testing.assert_allclose(ac, tc / x)
+    np.testing.assert_allclose(mc, 2 + 2 * x)
+    with pytest.raises(ValueError):
+        tc[0] = 0.0
+    # A different fixed cost gets its own grid
+    assert EconomicCosts(fixed_cost=50).cost_grid()[1] is not tc
+
+@pytest.mark.parametrize('fixed_cost', [25, 49, 100])
+def test_analytic_minimum_ac_matches_grid_scan(fixed_cost):
+    econ = EconomicCosts(fixed_cost=fixed_cost)
+    x_min, ac_min = econ.find_minimum_ac()
+    assert x_min == pytest.approx(np.sqrt(fixed_cost))
+    assert ac_min == pytest.approx(econ.average_cost(x_min))
+    # An equal but user-supplied cost function takes the grid scan
+    scanned = EconomicCosts(fixed_cost=fixed_cost)
+    scanned.variable_cost_fn = lambda x: 2 * x + x**2
+    x_scan, ac_scan = scanned.find_minimum_ac()
+    assert x_scan == pytest.approx(x_min, abs=0.01)
+    assert ac_scan == pytest.approx(ac_min, abs=1e-4)
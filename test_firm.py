@@ -0,0 +1,44 @@
+# test_firm.py
+import numpy as np
+import pytest
+from firm import Firm, FirmPool
+from main import create_base_firm_params, create_firms_config
+
+def build_firms():
+    """main's three example firms"""
+    return [Firm(config['name'], config['params']) for config in create_firms_config(create_base_firm_params())]
+
+# Prices below and above the firms' target prices, and a capital level at
+# which the capital constraint binds
+@pytest.mark.parametrize('market_price, capital', [(5.0, None), (30.0, None), (200.0, None), (200.0, 50.0)])
+def test_pool_production_matches_firms(market_price, capital):
+    firms = build_firms()
+    if capital is not None:
+        for firm in firms:
+            firm.capital = capital
+    pool = FirmPool(firms)
+    expected = [firm.make_production_decision(market_price) for firm in firms]
+    np.testing.assert_allclose(pool.decide_production(market_price), expected, rtol=1e-12)
+
+@pytest.mark.parametrize('capital', [1000.0, 3000.0, 20000.0])
+def test_pool_investment_matches_firms(capital):
+    firms = build_firms()
+    for firm in firms:
+        firm.capital = capital
+    pool = FirmPool(firms)
+    pool.make_investment_decisions()
+    for firm in firms:
+        firm.make_investment_decisions(market_price=60.0)
+    np.testing.assert_allclose(pool.capital, [firm.capital for firm in firms], rtol=1e-12)
+    np.testing.assert_allclose(pool.total_costs, [firm.total_costs for firm in firms], rtol=1e-12)
+    np.testing.assert_allclose(pool.capacity, [firm.production.capacity for firm in firms], rtol=1e-12)
+    np.testing.assert_allclose(pool.efficiency, [firm.production.efficiency for firm in firms], rtol=1e-12)
+
+def test_firms_decide_on_written_back_state():
+    firms = build_firms()
+    pool = FirmPool(firms)
+    pool.make_investment_decisions()
+    pool.write_back(firms)
+    # Investment changed capacity and efficiency, so the firms' cached unit cost is stale
+    expected = FirmPool(firms).decide_production(30.0)
+    np.testing.assert_allclose([firm.make_production_decision(30.0) for firm in firms], expected, rtol=1e-12)
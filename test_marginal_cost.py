@@ -0,0 +1,23 @@
+# test_marginal_cost.py
+import warnings
+import numpy as np
+from marginal_cost import marginal_cost_numerical
+
+def test_central_difference_accuracy():
+    x = np.array([0.5, 1.0, 10.0, 1e4])
+    mc = marginal_cost_numerical(x, 100, lambda q: 2 * q + q**2)
+    np.testing.assert_allclose(mc, 2 + 2 * x, rtol=1e-9)
+    assert np.isclose(marginal_cost_numerical(3.0, 0, np.exp), np.exp(3.0), rtol=1e-9)
+
+def test_forward_difference_at_zero():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        mc = marginal_cost_numerical(0.0, 0, np.sqrt)
+        mc_array = marginal_cost_numerical(np.array([0.0, 4.0]), 0, np.sqrt)
+    assert np.isfinite(mc) and mc > 0
+    assert np.isfinite(mc_array[0])
+    assert np.isclose(mc_array[1], 0.25, rtol=1e-9)
+
+def test_default_variable_cost_is_linear():
+    assert marginal_cost_numerical(5.0) == 1.0
+    np.testing.assert_array_equal(marginal_cost_numerical(np.arange(3)), np.ones(3))
@@ -0,0 +1,134 @@
+# test_market.py
+import copy
+import numpy as np
+import pytest
+from market import Market, simulate_scenarios
+from firm import Firm
+from main import create_market_params, create_base_firm_params, create_firms_config
+
+def build_market(dtype=np.float64, **demand_overrides):
+    """Market from main's example parameters with its three example firms"""
+    params = create_market_params()
+    params['demand'].update(demand_overrides)
+    market = Market(params, dtype=dtype)
+    for config in create_firms_config(create_base_firm_params()):
+        market.add_firm(Firm(config['name'], config['params'], max_periods=params['max_periods']))
+    return market
+
+def test_float32_market_with_numpy_scalar_demand():
+    # Demand built from NumPy scalars returns np.float64 prices
+    market = build_market(np.float32, base_price=np.float64(100))
+    market.simulate_period()
+    market.run()
+    assert market.current_period == market.max_periods
+    for metrics in market.firm_metrics.values():
+        assert metrics['revenue'].dtype == np.float32
+    assert all(np.isfinite(firm.capital) for firm in market.firms)
+
+def test_run_continues_past_max_periods():
+    market = build_market()
+    market.run()
+    market.simulate_period()
+    market.run(market.max_periods)
+    n = 2 * market.max_periods + 1
+    assert market.current_period == n
+    for metrics in market.firm_metrics.values():
+        assert all(len(values) == n for values in metrics.values())
+    assert all(len(firm.production_history) == n for firm in market.firms)
+    # Growing the metric arrays keeps the earlier periods
+    reference = build_market()
+    reference.run()
+    for firm_name, revenue in reference.get_firm_series('revenue').items():
+        np.testing.assert_array_equal(market.get_firm_series('revenue')[firm_name][:len(revenue)], revenue)
+
+def test_simulate_scenarios_matches_sequential_runs():
+    scales = [0.7, 1.0, 1.3]
+    sequential = [build_market(base_price=100 * scale) for scale in scales]
+    for market in sequential:
+        market.run()
+    batched = [build_market(base_price=100 * scale) for scale in scales]
+    simulate_scenarios(batched)
+    for seq, bat in zip(sequential, batched):
+        assert seq.price_history == bat.price_history
+        np.testing.assert_array_equal([f.capital for f in bat.firms], [f.capital for f in seq.firms])
+
+def test_simulate_scenarios_continues_past_max_periods():
+    n_periods = build_market().max_periods + 3
+    sequential = [build_market(), build_market(base_price=120)]
+    for market in sequential:
+        market.run(n_periods)
+    batched = [build_market(), build_market(base_price=120)]
+    simulate_scenarios(batched, n_periods)
+    for seq, bat in zip(sequential, batched):
+        assert bat.current_period == n_periods
+        assert seq.price_history == bat.price_history
+        for firm_name, costs in seq.get_firm_series('costs').items():
+            np.testing.assert_array_equal(bat.get_firm_series('costs')[firm_name], costs)
+
+def test_market_queries_follow_direct_inventory_changes():
+    market = build_market()
+    market.simulate_period()
+    market.calculate_market_concentration()
+    market.firms[0].inventory.add_stock(50)
+    market.firms[1].inventory.add_stock(25)
+    stats = market.get_market_stats()
+    assert stats['total_supply'] == 75
+    assert sum(stats['market_shares'].values()) == pytest.approx(1.0)
+    assert stats['market_concentration'] == pytest.approx(10000 * ((2 / 3) ** 2 + (1 / 3) ** 2))
+    assert market.get_market_phase() == "Stable Oligopoly"
+
+def test_simulate_period_follows_direct_firm_changes():
+    market = build_market()
+    market.simulate_period()
+    market.firms[0].costs.fixed_costs = 5000
+    market.firms[1].risk_tolerance = 1.0
+    reference = copy.deepcopy(market.firms)
+    market.simulate_period()
+    price = market.price_history[-1]
+    for firm, ref in zip(market.firms, reference):
+        ref._recompute_unit_cost()
+        assert firm.production_history[-1] == pytest.approx(ref.make_production_decision(price), rel=1e-12)
+
+def _branching_phase(concentration, price_trend):
+    """The if/elif market phase rules that classify_market_phase replaces"""
+    if concentration > 2500:
+        if price_trend > 0.05:
+            return "Monopolistic Growth"
+        elif price_trend < -0.05:
+            return "Market Correction"
+        return "Stable Oligopoly"
+    if price_trend > 0.05:
+        return "Competitive Growth"
+    elif price_trend < -0.05:
+        return "Price War"
+    return "Stable Competition"
+
+def test_classify_market_phase_boundaries():
+    trends = [-0.5, np.nextafter(-0.05, -1), -0.05, 0.0, 0.05, np.nextafter(0.05, 1), 0.5]
+    concentrations = [0.0, 2500.0, np.nextafter(2500.0, np.inf), 10000.0]
+    for concentration in concentrations:
+        for trend in trends:
+            expected = _branching_phase(concentration, trend)
+            assert Market.classify_market_phase(concentration, trend) == expected
+    # Arrays are classified elementwise
+    grid_c, grid_t = np.meshgrid(concentrations, trends)
+    phases = Market.classify_market_phase(grid_c, grid_t)
+    assert phases.tolist() == [[_branching_phase(c, t) for c in concentrations] for t in trends]
+
+def _explicit_price_trend(prices, periods):
+    """Mean relative price change over the last periods prices"""
+    recent = prices[-periods:]
+    if len(recent) < 2:
+        return 0
+    changes = [(recent[i] - recent[i - 1]) / recent[i - 1] for i in range(1, len(recent))]
+    return sum(changes) / len(changes)
+
+def test_rolling_price_trend_matches_explicit_window():
+    market = build_market(seasonal_factors=[1.0, 1.3, 0.8, 1.1, 0.9, 1.2])
+    assert market.get_price_trend() == 0
+    for _ in range(3 * Market.PRICE_TREND_PERIODS):
+        market.simulate_period()
+        expected = _explicit_price_trend(market.price_history, Market.PRICE_TREND_PERIODS)
+        assert market.get_price_trend() == pytest.approx(expected, rel=1e-12, abs=1e-15)
+    # Other window lengths are computed directly
+    assert market.get_price_trend(3) == _explicit_price_trend(market.price_history, 3)